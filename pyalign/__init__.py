@@ -22,19 +22,47 @@
 # SOFTWARE.
 #
 
+import warnings as _warnings
+import operator as _operator
 from math import inf as _INFTY
+from numbers import Integral as _Integral
 from collections import namedtuple as _namedtuple
 
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+try:
+    import numba as _numba
+except ImportError:
+    _numba = None
+
+try:
+    from . import _sw
+except ImportError:
+    _sw = None
+
 VERSION_STR = '1.0.0a1'
 
 DEBUG = False
 
+# set to True to have numba compute the cells of each antidiagonal in parallel (see
+# _parallel_antidiagonal_fill()), instead of using the Cython extension or the serial fill.
+# this only pays off with several cores and long antidiagonals, and it is not used for
+# custom distances whose losses are not looked up from symbol tables (see _BANDED).
+PARALLEL = False
+
 def debug(msg, end='\n'):
     if DEBUG is True:
         print(f"... {msg}", end=end, flush=True)
 
 Item    = _namedtuple('Item', ('offset', 'value'))
 Aligned = _namedtuple('Aligned', ('first', 'second'))
+_new_tuple = tuple.__new__
+
+# the step codes stored in the trace matrix
+_MATCH, _SKIP1, _SKIP2 = 0, 1, 2
 
 class AlignmentResult(_namedtuple('_AlignmentResult', ('aligned', 'loss'))):
     @staticmethod
@@ -70,75 +98,587 @@ class AlignmentResult(_namedtuple('_AlignmentResult', ('aligned', 'loss'))):
         return self.__class__(self.aligned + other.aligned,
                               self.loss + other.loss)
 
+class _Difference:
+    """the distance function returned by difference().
+
+    SmithWaterman() recognizes its instances by their type, and has the compiled
+    fills compute the differences instead of calling them. the instances keep the
+    `__name__` of the function that difference() used to return."""
+    __slots__ = ('skip_penalty1', 'skip_penalty2')
+    __name__  = '_compute_difference'
+
+    def __init__(self, skip_penalty1, skip_penalty2):
+        self.skip_penalty1 = skip_penalty1
+        self.skip_penalty2 = skip_penalty2
+
+    def __call__(self, item1, item2):
+        if item1 is None:
+            return self.skip_penalty1
+        elif item2 is None:
+            return self.skip_penalty2
+        else:
+            return abs(item1 - item2)
+
 def difference(skip_penalty=None, skip_penalty2=None):
     if skip_penalty is None:
         skip_penalty = _INFTY
     skip_penalty1 = skip_penalty
     if skip_penalty2 is None:
         skip_penalty2 = skip_penalty
-    def _compute_difference(item1, item2):
-        if item1 is None:
-            return skip_penalty1
-        elif item2 is None:
-            return skip_penalty2
-        else:
-            return abs(item1 - item2)
-    return _compute_difference
+    return _Difference(skip_penalty1, skip_penalty2)
 
 def SmithWaterman(first_seq, second_seq, distance=None,
-                  skip_penalty=None, skip_penalty2=None):
+                  skip_penalty=None, skip_penalty2=None, band=None):
     """perform alignment between `first_seq` and `second_seq`
     based on the Smith-Waterman method.
 
     `distance` must be the function that takes the form of `distance(first_item, second_item)`
     and returns the distance (loss function) between the two. If either is a skip, None will
-    be assigned.
+    be assigned. If `distance` is not given, `difference(skip_penalty, skip_penalty2)` is used.
+    If `distance` raises ValueError, the pair of items cannot be aligned (i.e. the loss is
+    infinite). The loss of the alignment is the sum of the losses as python adds them up
+    (e.g. an int if they are all integers), with or without the compiled extension.
+
+    `distance` is called at most once for every pair of items within the band, and for skipping
+    each item. With the compiled extension or numba, these calls are all made before the
+    alignment starts.
+    If both sequences consist of hashable items with few distinct values (e.g. DNA), `distance`
+    is instead called once per pair of distinct values (and once per distinct value for the
+    skips), and items that compare equal (such as 1, 1.0 and True) are assumed to have the same
+    distances. `distance` should therefore depend only on the values of the items, and not on
+    the order or the number of the calls.
+
+    If `band` is given, only the pairs of items whose offsets differ by `band` or less
+    are considered for the alignment. This reduces the computation and the memory for
+    near-identical sequences from (first_size x second_size) to (first_size x (2 x band + 1)).
+    `band` must be an integer no less than the difference in the sizes of the sequences.
 
     Returns the AlignmentResult named tuple.
     """
     first_size  = len(first_seq)
     second_size = len(second_seq)
-    if first_size > 900 or second_size > 900:
-        raise ValueError("size of the sequence may be too long; consider splitting in pieces")
+    if band is None:
+        band = max(first_size, second_size)
+    else:
+        try:
+            band = _operator.index(band)
+        except TypeError:
+            raise TypeError(f"band must be an integer, got {band.__class__.__name__}") from None
+        if band < 0:
+            raise ValueError(f"band must be non-negative, got {band}")
+        elif band < abs(first_size - second_size):
+            raise ValueError(f"band must be at least the difference in the sequence sizes "
+                             f"({abs(first_size - second_size)}), got {band}")
+        # a wider band covers no more cells
+        band = min(band, max(first_size, second_size))
+    # the trace matrix stores `width` cells for each row (see _row_start())
+    width = _band_width(second_size, band)
+    if (first_size + 1) * width > 901 * 901:
+        _warnings.warn("size of the sequence may be too long; consider splitting in pieces, "
+                       "or setting a (narrower) `band`", RuntimeWarning)
+    if DEBUG is True:
+        debug(f"--> {first_size} x {second_size}")
 
     if distance is None:
-        distance = difference(skip_penalty, skip_penalty)
-
-    # prepare memo
-    memo = {}
-
-    NOVALUE = Item(None, None)
-    def _compute_alignment(offset1, offset2):
-        debug(f"--> {offset1}, {offset2}")
-        if (offset1, offset2) not in memo.keys():
-            if offset1 == first_size:
-                if offset2 == second_size:
-                    memo[offset1, offset2] = AlignmentResult([], 0)
-                else:
-                    memo[offset1, offset2] = AlignmentResult.from_pair(NOVALUE,
-                                                                Item(offset2, second_seq[offset2]),
-                                                                distance) \
-                                                + _compute_alignment(offset1, offset2+1)
-            elif offset2 == second_size:
-                memo[offset1, offset2] = AlignmentResult.from_pair(Item(offset1,first_seq[offset1]),
-                                                                NOVALUE,
-                                                                distance) \
-                                            + _compute_alignment(offset1+1, offset2)
+        distance = difference(skip_penalty, skip_penalty2)
+
+    # `prepared` is left None if the compiled fills cannot reproduce the losses
+    # as summed up in python
+    prepared = None
+    losses   = None
+    if _native_fill is not None:
+        if type(distance) is _Difference:
+            # the compiled fills compute difference() from the items themselves
+            prepared = _difference_inputs(first_seq, second_seq, distance)
+        if prepared is None:
+            # the losses are kept for the pure-Python fill in case they are not representable,
+            # so that `distance` is not called twice
+            losses   = _python_losses(first_seq, second_seq, distance, band, eager=True)
+            prepared = _loss_inputs(losses, first_size, band)
+    if prepared is not None:
+        inputs, loss_types = prepared
+        fill = _native_fill
+        if (PARALLEL is True) and (inputs[0] != _BANDED) and (_numba is not None):
+            fill = _compiled_parallel_fill()
+        loss, trace = fill(*inputs, band, _infinity(inputs[-1].dtype))
+        # the memoryview yields plain ints, instead of numpy scalars
+        result = _traceback(first_seq, second_seq, memoryview(trace), band, loss)
+        return AlignmentResult(result.aligned,
+                               _python_loss(result, loss_types, first_size, second_size))
+
+    # the losses for skipping each item do not depend on the cell
+    if losses is None:
+        losses = _python_losses(first_seq, second_seq, distance, band)
+    row_losses, skip1, skip2, _ = losses
+
+    # trace[_row_start(i, band, width) + j] holds the step to be taken from (i, j) to attain
+    # the minimum loss for aligning first_seq[i:] with second_seq[j:]. only the cells within
+    # the band have their steps stored, and only two rows of the losses are kept: `below`
+    # for first_seq[offset1+1:], and `current` for first_seq[offset1:]. the cells outside
+    # the band are left with the infinite loss.
+    # a step takes one byte in the bytearray, which starts out filled with _MATCH (0).
+    stride  = second_size + 1
+    trace   = bytearray((first_size+1) * width)
+    below   = [_INFTY] * stride
+    current = [_INFTY] * stride
+
+    below[second_size] = 0
+    row = _row_start(first_size, band, width)
+    for offset2 in range(second_size-1, max(0, first_size - band)-1, -1):
+        below[offset2] = skip1[offset2] + below[offset2+1]
+        trace[row + offset2] = _SKIP1
+
+    for offset1 in range(first_size-1, -1, -1):
+        row = _row_start(offset1, band, width)
+        if abs(offset1 - second_size) <= band:
+            current[second_size] = skip2[offset1] + below[second_size]
+            trace[row + second_size] = _SKIP2
+        else:
+            current[second_size] = _INFTY
+
+        start = max(0, offset1 - band)
+        stop  = min(second_size, offset1 + band + 1)
+        if stop < second_size:
+            current[stop] = _INFTY
+        losses = row_losses(offset1)
+        for offset2 in range(stop-1, start-1, -1):
+            match      = losses[offset2 - start] + below[offset2+1]
+            skip_item1 = skip1[offset2] + current[offset2+1]
+            skip_item2 = skip2[offset1] + below[offset2]
+
+            # ties are resolved in the order of match, skip_item1, skip_item2
+            best, step = match, _MATCH
+            if skip_item1 < best:
+                best, step = skip_item1, _SKIP1
+            if skip_item2 < best:
+                best, step = skip_item2, _SKIP2
+            current[offset2]   = best
+            trace[row+offset2] = step
+        below, current = current, below
+
+    return _traceback(first_seq, second_seq, trace, band, below[0])
+
+def _band_width(second_size, band):
+    """returns the number of cells to be stored for each row of the trace matrix."""
+    return min(2*band + 1, second_size + 1)
+
+def _row_start(offset1, band, width):
+    """returns the position of the cell (offset1, 0) in the flat trace matrix, in which
+    row `offset1` only holds the cells max(0, offset1 - band) <= offset2 <= offset1 + band.
+    once offset1 >= band, the cell (offset1, offset2) lies at column offset2 - offset1 + band
+    of its row."""
+    return offset1*width - max(0, offset1 - band)
+
+def _python_losses(first_seq, second_seq, distance, band, eager=False):
+    """computes the losses for the pure-Python fill, and returns
+    `(row_losses, skip1, skip2, symbols)`.
+
+    `row_losses(offset1)` returns the list of the losses for matching first_seq[offset1] with
+    second_seq[start:stop], where `start` and `stop` bound the band in the row. `skip1[j]` is
+    the loss for skipping second_seq[j], and `skip2[i]` is the loss for skipping first_seq[i].
+    for sequences drawn from a small alphabet, the losses are looked up from symbol tables,
+    and `symbols` is `(table, codes1, codes2)`, where `table[codes1[i]][codes2[j]]` is the loss
+    for matching first_seq[i] with second_seq[j]. otherwise, `symbols` is None, and the rows
+    are computed as they are requested, unless `eager` is true."""
+    encoded = _encode_pair(first_seq, second_seq, band)
+    if encoded is not None:
+        (symbols1, codes1), (symbols2, codes2) = encoded
+        table  = [[_pair_loss(distance, symbol1, symbol2) for symbol2 in symbols2]
+                  for symbol1 in symbols1]
+        skips1 = [_pair_loss(distance, None, symbol2) for symbol2 in symbols2]
+        skips2 = [_pair_loss(distance, symbol1, None) for symbol1 in symbols1]
+
+        def row_losses(offset1):
+            losses = table[codes1[offset1]]
+            return [losses[code] for code in codes2[max(0, offset1 - band):offset1 + band + 1]]
+        return (row_losses, [skips1[code] for code in codes2], [skips2[code] for code in codes1],
+                (table, codes1, codes2))
+
+    second_size = len(second_seq)
+    def row_losses(offset1):
+        item1 = first_seq[offset1]
+        return [_pair_loss(distance, item1, second_seq[offset2])
+                for offset2 in range(max(0, offset1 - band), min(second_size, offset1 + band + 1))]
+    if eager:
+        row_losses = [row_losses(offset1) for offset1 in range(len(first_seq))].__getitem__
+    return (row_losses,
+            [_pair_loss(distance, None, item2) for item2 in second_seq],
+            [_pair_loss(distance, item1, None) for item1 in first_seq],
+            None)
+
+def _pair_loss(distance, value1, value2):
+    try:
+        return distance(value1, value2)
+    except ValueError:
+        return _INFTY
+
+def _traceback(first_seq, second_seq, trace, band, loss):
+    """walks the flat `trace` matrix from (0, 0) to reconstruct the alignment.
+
+    the walk never leaves the band: a step out of it would have an infinite loss,
+    which is never less than the loss of the match."""
+    first_size  = len(first_seq)
+    second_size = len(second_seq)
+    width       = _band_width(second_size, band)
+    NOVALUE     = Item(None, None)
+    aligned     = []
+    append      = aligned.append
+    offset1, offset2 = 0, 0
+    while (offset1 < first_size) or (offset2 < second_size):
+        # the items are built by tuple.__new__ directly, which is what
+        # the namedtuple constructors would end up calling anyway
+        step = trace[offset1*width - max(0, offset1 - band) + offset2]
+        if step == _MATCH:
+            append(_new_tuple(Aligned, (_new_tuple(Item, (offset1, first_seq[offset1])),
+                                        _new_tuple(Item, (offset2, second_seq[offset2])))))
+            offset1 += 1
+            offset2 += 1
+        elif step == _SKIP1:
+            append(_new_tuple(Aligned, (NOVALUE, _new_tuple(Item, (offset2, second_seq[offset2])))))
+            offset2 += 1
+        else:
+            append(_new_tuple(Aligned, (_new_tuple(Item, (offset1, first_seq[offset1])), NOVALUE)))
+            offset1 += 1
+    if DEBUG is True:
+        debug(f"<-- {first_size} x {second_size} = {loss}")
+    return AlignmentResult(aligned, loss)
+
+def _as_number_array(seq):
+    """returns `seq` as a 1-D numpy array, or None if it does not consist of numbers,
+    or if it mixes integers with floats (whose differences may be of either type)."""
+    arr = _np.asarray(seq)
+    if (arr.ndim != 1) or (arr.dtype.kind not in 'biuf'):
+        return None
+    if (arr.dtype.kind == 'f') and (not isinstance(seq, _np.ndarray)) \
+        and (not all(isinstance(item, float) for item in seq)):
+        return None
+    return arr
+
+# stand for the infinite loss in int32 and int64 inputs: any finite loss stays below them,
+# and adding any loss to them does not overflow (see _difference_inputs()).
+_INT32_INFINITY = 2**30
+_INT64_INFINITY = 2**62
+
+# the integers up to this magnitude are exact in float64
+_FLOAT64_EXACT = 2**53
+
+def _infinity(dtype):
+    """returns the value that stands for the infinite loss in the inputs of `dtype`."""
+    if dtype == _np.int32:
+        return _INT32_INFINITY
+    elif dtype == _np.int64:
+        return _INT64_INFINITY
+    else:
+        return _INFTY
+
+def _python_loss(result, loss_types, first_size, second_size):
+    """converts the loss computed by a compiled fill into what the pure-Python fill sums up:
+    an int if the losses of all the steps of the alignment are integers, and a float otherwise.
+
+    `loss_types` holds the types of the losses for a match, for skipping an item
+    of the second sequence, and for skipping an item of the first sequence."""
+    loss = result.loss
+    if loss == _INFTY:
+        return _INFTY
+    matches = first_size + second_size - len(result.aligned)
+    counts  = (matches, second_size - matches, first_size - matches)
+    if all((count == 0) or (loss_type is int) for count, loss_type in zip(counts, loss_types)):
+        return int(loss)
+    return float(loss)
+
+# how the compiled fills compute the loss for matching first_seq[i] with second_seq[j]:
+# |values1[i] - values2[j]| for _DIFFERENCE, table[codes1[i], codes2[j]] for _SYMBOLS,
+# and table[i, j - max(0, i - band)] for _BANDED.
+_DIFFERENCE, _SYMBOLS, _BANDED = 0, 1, 2
+
+# the inputs of the compiled fills are `(mode, values1, values2, codes1, codes2, table,
+# skip1, skip2)`, where `mode` tells how to compute the loss for matching first_seq[i] with
+# second_seq[j] (see above), `skip1[j]` is the loss for skipping second_seq[j], and `skip2[i]`
+# is the loss for skipping first_seq[i]. the arrays that are not used in the mode are left
+# empty. they come with `loss_types`, the argument of _python_loss().
+
+def _difference_inputs(first_seq, second_seq, distance):
+    """returns the inputs of the compiled fills for `distance` from difference(),
+    as `(inputs, loss_types)`.
+
+    if the items and the penalties are all integers, the inputs are int32 arrays, or int64 arrays
+    if the loss of an alignment may reach _INT32_INFINITY. otherwise, they are float64 arrays,
+    in which the integers among the losses must be exact. None is returned if neither holds,
+    or if the sequences do not consist of numbers."""
+    first_arr  = _as_number_array(first_seq)
+    second_arr = _as_number_array(second_seq)
+    if (first_arr is None) or (second_arr is None):
+        return None
+    skip_penalty1, skip_penalty2 = distance.skip_penalty1, distance.skip_penalty2
+    integral = (first_arr.dtype.kind in 'biu') and (second_arr.dtype.kind in 'biu')
+    loss_types = [int if integral else float]
+    for penalty in (skip_penalty1, skip_penalty2):
+        if isinstance(penalty, _Integral):
+            loss_types.append(int)
+        elif isinstance(penalty, float):
+            loss_types.append(float)
+        else:
+            return None
+
+    # the largest integer among the losses, computed on python ints
+    # (abs() overflows for the smallest int64)
+    largest = max([abs(int(penalty)) for penalty, loss_type
+                   in zip((skip_penalty1, skip_penalty2), loss_types[1:]) if loss_type is int],
+                  default=0)
+    if integral:
+        largest = max([2*max(-int(arr.min()), int(arr.max()))
+                       for arr in (first_arr, second_arr) if arr.size > 0] + [largest])
+    # an alignment consists of at most (first_size + second_size) steps
+    bound = (first_arr.shape[0] + second_arr.shape[0] + 1) * largest
+
+    if loss_types == [int, int, int]:
+        if bound < _INT32_INFINITY:
+            dtype = _np.int32
+        elif bound < _INT64_INFINITY:
+            dtype = _np.int64
+        else:
+            return None
+    elif bound < _FLOAT64_EXACT:
+        dtype = _np.float64
+    else:
+        return None
+    no_codes = _np.empty(0, dtype=_np.intp)
+    return ((_DIFFERENCE, first_arr.astype(dtype), second_arr.astype(dtype),
+             no_codes, no_codes, _np.empty((0, 0), dtype=dtype),
+             _np.full(second_arr.shape[0], skip_penalty1, dtype=dtype),
+             _np.full(first_arr.shape[0], skip_penalty2, dtype=dtype)), tuple(loss_types))
+
+def _loss_inputs(losses, first_size, band):
+    """returns the inputs of the compiled fills for the losses from _python_losses(),
+    as `(inputs, loss_types)`.
+
+    the losses are stored as float64, so the (finite) losses of each kind of step must be
+    either all floats, or all integers that float64 holds exactly, along with their sums.
+    None is returned otherwise."""
+    row_losses, skip1, skip2, symbols = losses
+    if symbols is not None:
+        table, codes1, codes2 = symbols
+        matches = [loss for row in table for loss in row]
+    else:
+        matches = [loss for offset1 in range(first_size) for loss in row_losses(offset1)]
+    loss_types = tuple(_loss_type(values) for values in (matches, skip1, skip2))
+    if None in loss_types:
+        return None
+
+    # an alignment consists of at most (first_size + second_size) steps
+    largest = max([abs(int(loss)) for values, loss_type in zip((matches, skip1, skip2), loss_types)
+                   if loss_type is int for loss in values if loss != _INFTY], default=0)
+    if (first_size + len(skip1) + 1) * largest >= _FLOAT64_EXACT:
+        return None
+
+    skip1 = _np.array(skip1, dtype=_np.float64)
+    skip2 = _np.array(skip2, dtype=_np.float64)
+    no_values = _np.empty(0, dtype=_np.float64)
+    if symbols is not None:
+        return ((_SYMBOLS, no_values, no_values,
+                 _np.array(codes1, dtype=_np.intp), _np.array(codes2, dtype=_np.intp),
+                 _np.array(table, dtype=_np.float64), skip1, skip2),
+                loss_types)
+
+    # the cells outside the band are never read
+    no_codes = _np.empty(0, dtype=_np.intp)
+    table    = _np.zeros((first_size, min(2*band + 1, len(skip1))), dtype=_np.float64)
+    for offset1 in range(first_size):
+        row = row_losses(offset1)
+        table[offset1, :len(row)] = row
+    return (_BANDED, no_values, no_values, no_codes, no_codes, table, skip1, skip2), loss_types
+
+def _loss_type(values):
+    """returns int if the finite `values` are all integers, float if they are all floats,
+    and None otherwise (in which case the type of a sum depends on the values summed up)."""
+    finite = [value for value in values if value != _INFTY]
+    if all(isinstance(value, _Integral) for value in finite):
+        return int
+    elif all(isinstance(value, float) for value in finite):
+        return float
+    return None
+
+def _encode(seq, max_symbols=256):
+    """returns `(symbols, codes)` such that `seq[i] == symbols[codes[i]]`, or None
+    if `seq` contains unhashable items or more than `max_symbols` distinct ones.
+    items that compare equal are assumed to have the same distances."""
+    index = {}
+    codes = []
+    try:
+        for item in seq:
+            code = index.setdefault(item, len(index))
+            if code >= max_symbols:
+                return None
+            codes.append(code)
+    except TypeError:
+        return None
+    return list(index), codes
+
+def _encode_pair(first_seq, second_seq, band):
+    """returns the results of _encode() for both sequences, or None if either cannot be
+    encoded, or if there are no fewer pairs of symbols than pairs of items within the band."""
+    encoded1 = _encode(first_seq)
+    if encoded1 is None:
+        return None
+    encoded2 = _encode(second_seq)
+    if (encoded2 is None) or (len(encoded1[0]) * len(encoded2[0])
+                                >= len(first_seq) * min(2*band + 1, len(second_seq))):
+        return None
+    return encoded1, encoded2
+
+def _fill(mode, values1, values2, codes1, codes2, table, skip1, skip2, band, infinity):
+    """the numeric counterpart of the fill in SmithWaterman(), reading the losses
+    from the inputs of _difference_inputs() or _loss_inputs(). returns the loss at (0, 0)
+    and the flat trace matrix, in which only the cells within the band are stored
+    (see _row_start()).
+
+    the losses are computed in the dtype of the inputs (float64, int32 or int64), and
+    `infinity` stands for the loss of the cells outside the band."""
+    first_size  = skip2.shape[0]
+    second_size = skip1.shape[0]
+    stride  = second_size + 1
+    width   = min(2*band + 1, stride)
+    trace   = _np.zeros((first_size+1) * width, dtype=_np.uint8)
+    below   = _np.full(stride, infinity, dtype=skip1.dtype)
+    current = _np.full(stride, infinity, dtype=skip1.dtype)
+
+    below[second_size] = 0
+    row = first_size*width - max(0, first_size - band)
+    for offset2 in range(second_size-1, max(0, first_size - band)-1, -1):
+        below[offset2] = skip1[offset2] + below[offset2+1]
+        trace[row + offset2] = _SKIP1
+
+    for offset1 in range(first_size-1, -1, -1):
+        row = offset1*width - max(0, offset1 - band)
+        if abs(offset1 - second_size) <= band:
+            current[second_size] = skip2[offset1] + below[second_size]
+            trace[row + second_size] = _SKIP2
+        else:
+            current[second_size] = infinity
+
+        start = max(0, offset1 - band)
+        stop  = min(second_size, offset1 + band + 1)
+        if stop < second_size:
+            current[stop] = infinity
+        for offset2 in range(stop-1, start-1, -1):
+            if mode == _DIFFERENCE:
+                match = values1[offset1] - values2[offset2]
+                if match < 0:
+                    match = -match
+            elif mode == _SYMBOLS:
+                match = table[codes1[offset1], codes2[offset2]]
             else:
-                # compute recursively
-                item1      = Item(offset1,first_seq[offset1])
-                item2      = Item(offset2,second_seq[offset2])
-
-                match      = AlignmentResult.from_pair(item1,   item2,   distance) \
-                                + _compute_alignment(offset1+1, offset2+1)
-                skip_item1 = AlignmentResult.from_pair(NOVALUE, item2,   distance) \
-                                + _compute_alignment(offset1,   offset2+1)
-                skip_item2 = AlignmentResult.from_pair(item1,   NOVALUE, distance) \
-                                + _compute_alignment(offset1+1, offset2)
-                memo[offset1, offset2] = min(match, skip_item1, skip_item2)
-
-        # must have already computed
-        debug(f"<-- {offset1}, {offset2} = {memo[offset1, offset2].loss}")
-        return memo[offset1, offset2]
-
-    return _compute_alignment(0, 0)
+                match = table[offset1, offset2 - start]
+            match     += below[offset2+1]
+            skip_item1 = skip1[offset2] + current[offset2+1]
+            skip_item2 = skip2[offset1] + below[offset2]
+
+            # branchless counterpart of the selection in SmithWaterman()
+            skip1_taken = skip_item1 < match
+            best        = skip_item1 if skip1_taken else match
+            skip2_taken = skip_item2 < best
+            current[offset2]   = skip_item2 if skip2_taken else best
+            trace[row+offset2] = skip1_taken + skip2_taken*(_SKIP2 - skip1_taken)
+        below, current = current, below
+    return below[0], trace
+
+def _parallel_antidiagonal_fill(mode, values1, values2, codes1, codes2, table,
+                                skip1, skip2, band, infinity):
+    """the counterpart of _fill() that proceeds along the antidiagonals, computing the cells
+    on each antidiagonal in parallel. only meant to be compiled by numba with parallel=True
+    (see _compiled_parallel_fill()).
+
+    SmithWaterman() does not use it in the _BANDED mode: the cells of an antidiagonal read
+    the loss table across its rows, which takes about five times as long as _fill() does."""
+    first_size  = skip2.shape[0]
+    second_size = skip1.shape[0]
+    width  = min(2*band + 1, second_size + 1)
+    trace  = _np.zeros((first_size+1) * width, dtype=_np.uint8)
+    diag   = _np.empty((3, first_size+1), dtype=skip1.dtype)
+
+    for t in range(first_size+second_size, -1, -1):
+        curr  = diag[t % 3]
+        prev1 = diag[(t+1) % 3]
+        prev2 = diag[(t+2) % 3]
+        lower = (t - band + 1) // 2
+        upper = (t + band) // 2
+
+        # the boundary cells at offset1 == first_size and at offset2 == second_size
+        last = first_size*width - max(0, first_size - band)
+        if t == first_size + second_size:
+            curr[first_size] = 0
+            trace[last + second_size] = _MATCH
+        elif t >= first_size:
+            if upper >= first_size >= lower:
+                curr[first_size] = skip1[t-first_size] + prev1[first_size]
+                trace[last + t-first_size] = _SKIP1
+            else:
+                curr[first_size] = infinity
+        if (t >= second_size) and (t - second_size < first_size):
+            offset1 = t - second_size
+            if upper >= offset1 >= lower:
+                curr[offset1] = skip2[offset1] + prev1[offset1+1]
+                trace[offset1*width - max(0, offset1 - band) + second_size] = _SKIP2
+            else:
+                curr[offset1] = infinity
+
+        # the cells just outside the band, to be read from the next antidiagonal
+        if 0 < lower <= first_size + 1:
+            curr[lower-1] = infinity
+        if upper < first_size:
+            curr[upper+1] = infinity
+
+        # the interior cells, which are independent of each other
+        start = max(0, t - second_size + 1, lower)
+        stop  = min(first_size, t + 1, upper + 1)
+        for k in _numba.prange(stop - start):
+            offset1 = start + k
+            row     = offset1*width - max(0, offset1 - band)
+            if mode == _DIFFERENCE:
+                match = values1[offset1] - values2[t-offset1]
+                if match < 0:
+                    match = -match
+            elif mode == _SYMBOLS:
+                match = table[codes1[offset1], codes2[t-offset1]]
+            else:
+                match = table[offset1, t - offset1 - max(0, offset1 - band)]
+            match     += prev2[offset1+1]
+            skip_item1 = skip1[t-offset1] + prev1[offset1]
+            skip_item2 = skip2[offset1] + prev1[offset1+1]
+
+            skip1_taken = skip_item1 < match
+            best        = skip_item1 if skip1_taken else match
+            skip2_taken = skip_item2 < best
+            curr[offset1] = skip_item2 if skip2_taken else best
+            trace[row + t-offset1] = skip1_taken + skip2_taken*(_SKIP2 - skip1_taken)
+    return diag[0, 0], trace
+
+def _warm_up(fill):
+    """has numba compile `fill` for the float64, the int32 and the int64 inputs."""
+    codes = _np.zeros(2, dtype=_np.intp)
+    for dtype, infinity in ((_np.float64, _INFTY), (_np.int32, _INT32_INFINITY),
+                            (_np.int64, _INT64_INFINITY)):
+        values = _np.zeros(2, dtype=dtype)
+        fill(_SYMBOLS, values, values, codes, codes, _np.zeros((2, 2), dtype=dtype),
+             values, values, 2, infinity)
+
+# the compiled fill to be used, if any: the Cython extension is
+# preferred over numba, as it requires no JIT compilation.
+if _sw is not None:
+    _native_fill = _sw.fill
+elif _numba is not None:
+    _native_fill = _numba.njit(cache=True, boundscheck=False)(_fill)
+    _warm_up(_native_fill)
+else:
+    _native_fill = None
+
+# compiled on the first alignment with PARALLEL set (see _compiled_parallel_fill())
+_parallel_fill = None
+
+def _compiled_parallel_fill():
+    """returns _parallel_antidiagonal_fill() as compiled by numba, compiling it if needed."""
+    global _parallel_fill
+    if _parallel_fill is None:
+        _parallel_fill = _numba.njit(cache=True, boundscheck=False,
+                                     parallel=True)(_parallel_antidiagonal_fill)
+    return _parallel_fill
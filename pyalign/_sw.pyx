@@ -0,0 +1,161 @@
+#
+# MIT License
+#
+# Copyright (c) 2019 Keisuke Sehara
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# cython: language_level=3
+
+"""the compiled counterpart of pyalign._fill()."""
+
+cimport cython
+from libc.stdint cimport int32_t, int64_t
+from libc.math cimport fabs
+import numpy as np
+
+# the losses are computed in float64, in int32 or in int64
+ctypedef fused loss_t:
+    double
+    int32_t
+    int64_t
+
+# must agree with the step codes in pyalign/__init__.py
+cdef enum:
+    MATCH = 0
+    SKIP1 = 1
+    SKIP2 = 2
+
+# must agree with the modes in pyalign/__init__.py
+cdef enum:
+    DIFFERENCE = 0
+    SYMBOLS    = 1
+    BANDED     = 2
+
+cdef inline Py_ssize_t _row_start(Py_ssize_t offset1, Py_ssize_t band,
+                                  Py_ssize_t width) noexcept nogil:
+    """the counterpart of pyalign._row_start()."""
+    return offset1*width - max(0, offset1 - band)
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef loss_t _fill(int mode, loss_t[::1] values1, loss_t[::1] values2,
+                  Py_ssize_t[::1] codes1, Py_ssize_t[::1] codes2, loss_t[:, ::1] table,
+                  loss_t[::1] skip1, loss_t[::1] skip2,
+                  Py_ssize_t band, loss_t infinity,
+                  loss_t[:, ::1] rows, unsigned char[::1] trace) noexcept nogil:
+    """fills `trace` row by row from the bottom, in the same manner as pyalign._fill(),
+    and returns the loss at (0, 0).
+
+    `rows` holds the losses of the two latest rows, `below` for first_seq[offset1+1:]
+    and `current` for first_seq[offset1:], and `trace` is the flat trace matrix, which
+    only holds the cells within the band (see pyalign._row_start()). the inner loop reads
+    and writes `trace`, `table`, `skip1` and the two rows contiguously."""
+    cdef Py_ssize_t first_size  = skip2.shape[0]
+    cdef Py_ssize_t second_size = skip1.shape[0]
+    cdef Py_ssize_t width       = min(2*band + 1, second_size + 1)
+    cdef Py_ssize_t offset1, offset2, start, stop
+    cdef loss_t *below   = &rows[0, 0]
+    cdef loss_t *current = &rows[1, 0]
+    cdef loss_t *swapped
+    cdef unsigned char *trace_row
+    cdef loss_t *table_row = NULL
+    cdef loss_t value1 = 0
+    cdef loss_t loss1, loss2
+    cdef loss_t match, skip_item1, skip_item2, best
+    cdef bint skip1_taken, skip2_taken
+
+    for offset2 in range(second_size + 1):
+        below[offset2]   = infinity
+        current[offset2] = infinity
+    below[second_size] = 0
+    trace_row = &trace[_row_start(first_size, band, width)]
+    for offset2 in range(second_size-1, max(0, first_size - band)-1, -1):
+        below[offset2] = skip1[offset2] + below[offset2+1]
+        trace_row[offset2] = SKIP1
+
+    for offset1 in range(first_size-1, -1, -1):
+        start = max(0, offset1 - band)
+        stop  = min(second_size, offset1 + band + 1)
+        trace_row = &trace[_row_start(offset1, band, width)]
+        if offset1 + band >= second_size:
+            current[second_size] = skip2[offset1] + below[second_size]
+            trace_row[second_size] = SKIP2
+        else:
+            current[second_size] = infinity
+        if stop < second_size:
+            current[stop] = infinity
+
+        # the losses of the cell on the right, and of skipping first_seq[offset1]
+        loss1 = current[stop]
+        loss2 = skip2[offset1]
+        if mode == DIFFERENCE:
+            value1 = values1[offset1]
+        elif mode == SYMBOLS:
+            table_row = &table[codes1[offset1], 0]
+        else:
+            table_row = &table[offset1, 0]
+        for offset2 in range(stop-1, start-1, -1):
+            if mode == DIFFERENCE:
+                match = value1 - values2[offset2]
+                if loss_t is double:
+                    # without a branch, which random values would mispredict
+                    match = fabs(match)
+                elif match < 0:
+                    match = -match
+            elif mode == SYMBOLS:
+                match = table_row[codes2[offset2]]
+            else:
+                match = table_row[offset2 - start]
+            match     += below[offset2+1]
+            skip_item2 = loss2 + below[offset2]
+            # the only loss that depends on the previous iteration (through `loss1`)
+            # is compared last, so that the iterations wait on one addition and one comparison
+            best       = skip_item2 if skip_item2 < match else match
+            skip_item1 = skip1[offset2] + loss1
+            loss1      = skip_item1 if skip_item1 < best else best
+            current[offset2] = loss1
+
+            # the same tie-breaking as in SmithWaterman()
+            skip1_taken = skip_item1 < match
+            skip2_taken = skip_item2 < (skip_item1 if skip1_taken else match)
+            trace_row[offset2] = skip1_taken + skip2_taken*(SKIP2 - skip1_taken)
+        swapped = below
+        below   = current
+        current = swapped
+    return below[0]
+
+def fill(int mode, loss_t[::1] values1, loss_t[::1] values2,
+         Py_ssize_t[::1] codes1, Py_ssize_t[::1] codes2, loss_t[:, ::1] table,
+         loss_t[::1] skip1, loss_t[::1] skip2, Py_ssize_t band, loss_t infinity):
+    """returns the loss at (0, 0) and the trace matrix, in the same manner as pyalign._fill()."""
+    if loss_t is double:
+        dtype = np.float64
+    elif loss_t is int32_t:
+        dtype = np.int32
+    else:
+        dtype = np.int64
+    cdef loss_t[:, ::1] rows = np.empty((2, skip1.shape[0]+1), dtype=dtype)
+    cdef loss_t loss
+    trace = np.zeros((skip2.shape[0]+1) * min(2*band + 1, skip1.shape[0]+1), dtype=np.uint8)
+    cdef unsigned char[::1] trace_view = trace
+    with nogil:
+        loss = _fill(mode, values1, values2, codes1, codes2, table, skip1, skip2,
+                     band, infinity, rows, trace_view)
+    return loss, trace
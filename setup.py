@@ -23,6 +23,22 @@
 #
 import setuptools
 
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    cythonize = None
+
+if cythonize is not None:
+    # the compiled kernel is optional: pyalign falls back to numba
+    # or to pure python if it cannot be built.
+    ext_modules = cythonize([
+        setuptools.Extension('pyalign._sw', ['pyalign/_sw.pyx'],
+                             extra_compile_args=['-O3'],
+                             optional=True),
+    ], language_level=3)
+else:
+    ext_modules = []
+
 setuptools.setup(
     name='pyalign',
     version='1.0.0a1',
@@ -38,6 +54,7 @@ setuptools.setup(
         'Programming Language :: Python :: 3',
         ],
     packages=['pyalign',],
+    ext_modules=ext_modules,
     entry_points={
         # 'console_scripts': [
         #     '%module% =%module%.__main__:run'
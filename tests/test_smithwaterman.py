@@ -0,0 +1,324 @@
+#
+# MIT License
+#
+# Copyright (c) 2019 Keisuke Sehara
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+"""checks every available fill of SmithWaterman() against a recursive reference."""
+
+import math
+import random
+import functools
+from fractions import Fraction
+
+import pytest
+
+import pyalign
+
+FILLS = ('python', 'cython', 'numba', 'numba-parallel')
+
+@functools.lru_cache(maxsize=None)
+def _fill_settings(name):
+    """returns the module attributes that make SmithWaterman() use the fill `name`."""
+    if name == 'python':
+        return dict(_native_fill=None, _parallel_fill=None, PARALLEL=False)
+    elif name == 'cython':
+        if pyalign._sw is None:
+            pytest.skip("the Cython extension is not built")
+        return dict(_native_fill=pyalign._sw.fill, _parallel_fill=None, PARALLEL=False)
+    if pyalign._numba is None:
+        pytest.skip("numba is not installed")
+    numba_fill = pyalign._numba.njit(boundscheck=True)(pyalign._fill)
+    if name == 'numba':
+        return dict(_native_fill=numba_fill, _parallel_fill=None, PARALLEL=False)
+    else:
+        parallel_fill = pyalign._numba.njit(boundscheck=True,
+                                            parallel=True)(pyalign._parallel_antidiagonal_fill)
+        return dict(_native_fill=numba_fill, _parallel_fill=parallel_fill, PARALLEL=True)
+
+@pytest.fixture(params=FILLS)
+def fill(request, monkeypatch):
+    for attr, value in _fill_settings(request.param).items():
+        monkeypatch.setattr(pyalign, attr, value)
+    return request.param
+
+def reference(first_seq, second_seq, distance, band=None):
+    """the straightforward recursion that SmithWaterman() implements.
+    returns the loss and the offset pairs of the alignment."""
+    first_size  = len(first_seq)
+    second_size = len(second_seq)
+    if band is None:
+        band = max(first_size, second_size)
+
+    def loss_of(item1, item2):
+        try:
+            return distance(item1, item2)
+        except ValueError:
+            return math.inf
+
+    @functools.lru_cache(maxsize=None)
+    def solve(offset1, offset2):
+        if abs(offset1 - offset2) > band:
+            return math.inf, ()
+        if (offset1 == first_size) and (offset2 == second_size):
+            return 0, ()
+        candidates = []
+        if (offset1 < first_size) and (offset2 < second_size):
+            loss, path = solve(offset1+1, offset2+1)
+            candidates.append((loss_of(first_seq[offset1], second_seq[offset2]) + loss,
+                               ((offset1, offset2),) + path))
+        if offset2 < second_size:
+            loss, path = solve(offset1, offset2+1)
+            candidates.append((loss_of(None, second_seq[offset2]) + loss,
+                               ((None, offset2),) + path))
+        if offset1 < first_size:
+            loss, path = solve(offset1+1, offset2)
+            candidates.append((loss_of(first_seq[offset1], None) + loss,
+                               ((offset1, None),) + path))
+        # ties are resolved in the order of match, skip_item1, skip_item2
+        best = candidates[0]
+        for candidate in candidates[1:]:
+            if candidate[0] < best[0]:
+                best = candidate
+        return best
+
+    loss, path = solve(0, 0)
+    return loss, list(path)
+
+def check(first_seq, second_seq, distance=None, band=None, **kwargs):
+    """aligns the sequences, and compares the result with reference()."""
+    result = pyalign.SmithWaterman(first_seq, second_seq, distance=distance, band=band, **kwargs)
+    if distance is None:
+        distance = pyalign.difference(kwargs.get('skip_penalty'), kwargs.get('skip_penalty2'))
+    loss, path = reference(first_seq, second_seq, distance, band)
+    assert result.loss == loss
+    assert type(result.loss) is type(loss)
+    if math.isfinite(loss):
+        assert [(pair.first.offset, pair.second.offset) for pair in result.aligned] == path
+        for pair in result.aligned:
+            if pair.first.offset is not None:
+                assert pair.first.value is first_seq[pair.first.offset]
+            if pair.second.offset is not None:
+                assert pair.second.value is second_seq[pair.second.offset]
+    return result
+
+def random_sequences(rng, max_size=8, values=range(-3, 4)):
+    values = list(values)
+    return ([rng.choice(values) for _ in range(rng.randint(0, max_size))],
+            [rng.choice(values) for _ in range(rng.randint(0, max_size))])
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_difference(fill, seed):
+    rng = random.Random(seed)
+    for _ in range(10):
+        first_seq, second_seq = random_sequences(rng)
+        check(first_seq, second_seq, skip_penalty=rng.choice([0, 1, 2, 3, 1.5]))
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_band(fill, seed):
+    rng = random.Random(seed)
+    for _ in range(10):
+        first_seq, second_seq = random_sequences(rng)
+        least = abs(len(first_seq) - len(second_seq))
+        for band in range(least, max(len(first_seq), len(second_seq)) + 2):
+            check(first_seq, second_seq, band=band, skip_penalty=rng.choice([1, 2, 2.5]))
+
+def test_band_too_narrow(fill):
+    with pytest.raises(ValueError):
+        pyalign.SmithWaterman([1, 2, 3], [1], band=1, skip_penalty=1)
+
+def test_band_validation(fill):
+    with pytest.raises(TypeError):
+        pyalign.SmithWaterman([1, 2, 3], [1, 2], band=1.5, skip_penalty=1)
+    with pytest.raises(TypeError):
+        pyalign.SmithWaterman([1, 2, 3], [1, 2], band='2', skip_penalty=1)
+    with pytest.raises(ValueError, match='non-negative'):
+        pyalign.SmithWaterman([1, 2], [1, 2], band=-1, skip_penalty=1)
+    # integers of other types are accepted
+    check([1, 2, 3], [1, 2], band=True, skip_penalty=1)
+    if pyalign._np is not None:
+        check([1, 2, 3], [1, 2], band=pyalign._np.int64(2), skip_penalty=1)
+
+def test_ties(fill):
+    # every alignment of these has the same loss
+    check([1, 1, 1], [1, 1], skip_penalty=0)
+    check([1, 2], [2, 1], skip_penalty=1)
+    check([0, 0, 0, 0], [1, 1, 1, 1], skip_penalty=0.5)
+    check([5], [5, 5, 5, 5], skip_penalty=0, band=3)
+
+def test_empty(fill):
+    assert check([], []).loss == 0
+    assert check([], [1, 2], skip_penalty=2).loss == 4
+    assert check([1, 2, 3], [], skip_penalty=1.5).loss == 4.5
+    assert check([1], [], band=1, skip_penalty=1).loss == 1
+
+def test_infinite_skip(fill):
+    assert math.isinf(check([1, 2, 3], [1, 2]).loss)
+    assert check([1, 2, 3], [3, 2, 1]).loss == 4
+
+def test_skip_penalty2(fill):
+    result = check([1, 2, 3], [2], skip_penalty=1, skip_penalty2=5)
+    assert result.loss == 10
+    check([1], [2, 3, 4], skip_penalty=1, skip_penalty2=5)
+
+def test_int32_bound(fill):
+    sizes   = 5, 5
+    largest = (pyalign._INT32_INFINITY - 1) // (2 * (sum(sizes) + 1))
+    for top in (largest, largest + 1):
+        rng = random.Random(top)
+        first_seq  = [top] + [rng.randint(-top, top) for _ in range(sizes[0] - 1)]
+        second_seq = [-top] + [rng.randint(-top, top) for _ in range(sizes[1] - 1)]
+        assert type(check(first_seq, second_seq, skip_penalty=top).loss) is int
+    assert type(check([1, 2, 3], [2, 3], skip_penalty=1).loss) is int
+    assert type(check([1, 2, 3], [2, 3], skip_penalty=1.0).loss) is float
+
+def substitution(item1, item2):
+    if item1 is None or item2 is None:
+        return 2
+    elif item1 == item2:
+        return 0
+    elif {item1, item2} in ({'A', 'G'}, {'C', 'T'}):
+        return 1
+    else:
+        return 3
+
+@pytest.mark.parametrize('seed', range(10))
+def test_custom_distance(fill, seed):
+    rng = random.Random(seed)
+    for _ in range(10):
+        first_seq, second_seq = random_sequences(rng, max_size=12, values='ACGT')
+        check(first_seq, second_seq, substitution)
+        check(''.join(first_seq), ''.join(second_seq), substitution,
+              band=abs(len(first_seq) - len(second_seq)) + 1)
+
+def test_custom_loss_types(fill):
+    # the losses that float64 cannot reproduce as python sums them up
+    def scaled(*losses):
+        def distance(item1, item2):
+            if (item1 is None) or (item2 is None):
+                return losses[0]
+            return losses[(item1 + item2) % len(losses)]
+        return distance
+    first_seq, second_seq = [1, 2, 3, 4], [2, 3, 5]
+    for losses in ((Fraction(1, 3), Fraction(1, 2)), (2**70, 1), (1, 2.5), (0.5, 10**17),
+                   (2, 3), (0.5, 1.5), (True, 2)):
+        check(first_seq, second_seq, scaled(*losses))
+        check(first_seq, second_seq, scaled(*losses), band=1)
+        check(''.join(map(str, first_seq)), ''.join(map(str, second_seq)),
+              lambda item1, item2: scaled(*losses)(item1 and int(item1), item2 and int(item2)))
+    assert type(check('AG', 'AC', substitution).loss) is int
+
+def test_unhashable_items(fill):
+    def distance(item1, item2):
+        if item1 is None or item2 is None:
+            return 1
+        return abs(item1[0] - item2[0])
+    check([[1], [2], [3]], [[2], [3], [5], [0]], distance)
+    check([[1], [2], [3]], [[2], [3], [5], [0]], distance, band=2)
+
+def test_distance_raising_value_error(fill):
+    def distance(item1, item2):
+        if (item1 == 'A') and (item2 == 'T'):
+            raise ValueError("A cannot be aligned with T")
+        elif item2 == 'G':
+            raise ValueError("G cannot be skipped")
+        return substitution(item1, item2)
+    check('AAT', 'TTA', distance)
+    check('AT', 'TGA', distance)
+    assert check('A', 'T', distance, band=1).loss == 4
+    assert math.isinf(check('A', 'T', distance, band=0).loss)
+
+def test_wrapped_difference(fill):
+    base = pyalign.difference(1)
+    @functools.wraps(base)
+    def scaled(item1, item2):
+        loss = base(item1, item2)
+        return loss if (item1 is None) or (item2 is None) else 10 * loss
+    assert check([1, 2], [2, 3], scaled).loss == 2
+
+def test_distance_called_within_band(fill):
+    calls = []
+    def distance(item1, item2):
+        calls.append((item1, item2))
+        if (item1 is None) or (item2 is None):
+            return 1
+        return abs(item1 - item2) / 10
+    # the items are all distinct, so that they are not looked up from a symbol table
+    first_seq  = [float(offset) for offset in range(12)]
+    second_seq = [float(offset) for offset in range(9)]
+    check(first_seq, second_seq, distance, band=4)
+    assert all(abs(item1 - item2) <= 4 for item1, item2 in calls
+               if (item1 is not None) and (item2 is not None))
+
+def test_distance_called_per_symbol(fill):
+    calls = []
+    def distance(item1, item2):
+        calls.append((item1, item2))
+        return substitution(item1, item2)
+    rng = random.Random(0)
+    first_seq  = ''.join(rng.choice('ACGT') for _ in range(40))
+    second_seq = ''.join(rng.choice('ACG') for _ in range(30))
+    pyalign.SmithWaterman(first_seq, second_seq, distance=distance)
+    # once per pair of symbols, and once for skipping each symbol
+    assert len(set(calls)) == len(calls)
+    assert len(calls) == 4 * 3 + 3 + 4
+    check(first_seq, second_seq, substitution)
+
+def test_parallel_opt_in(monkeypatch):
+    if (pyalign._numba is None) or (pyalign._native_fill is None):
+        pytest.skip("numba is not installed")
+    modes = []
+    def parallel_fill(mode, *args):
+        modes.append(mode)
+        return pyalign._native_fill(mode, *args)
+    monkeypatch.setattr(pyalign, '_parallel_fill', parallel_fill)
+    check([1, 2, 3], [2, 3], skip_penalty=1)
+    assert modes == []
+    monkeypatch.setattr(pyalign, 'PARALLEL', True)
+    check([1, 2, 3], [2, 3], skip_penalty=1)
+    check('ACGTTGCA', 'AGTCCA', substitution)
+    check([[1], [2], [3]], [[2], [3]], lambda item1, item2: 1 if None in (item1, item2) else 0)
+    assert modes == [pyalign._DIFFERENCE, pyalign._SYMBOLS]
+
+def test_difference_is_function_like():
+    compute = pyalign.difference(1, 2)
+    assert compute.__name__ == '_compute_difference'
+    assert (compute(None, 3), compute(3, None), compute(1, 4)) == (1, 2, 3)
+
+def test_smallest_int64(fill):
+    check([-2**63], [0], skip_penalty=1)
+    check([-2**63, 2**63 - 1], [0, -2**63], skip_penalty=1)
+
+def test_large_integers(fill):
+    # beyond int32, and beyond the integers that float64 holds exactly
+    for first_seq, second_seq, skip_penalty in (([10**17 + 1], [10**17], 1),
+                                                ([2**62, -2**62, 3], [2**62 - 1, 0], 2**60),
+                                                ([2**63 - 1, 0], [-2**63], 2**62)):
+        assert type(check(first_seq, second_seq, skip_penalty=skip_penalty).loss) is int
+
+def test_number_types(fill):
+    # the type of the loss follows the steps taken, as the sum does in python
+    assert type(check([1, 2], [1, 2], skip_penalty=1.5).loss) is int
+    assert type(check([1, 2], [2], skip_penalty=1.5).loss) is float
+    assert type(check([1.0, 2.0], [1, 2], skip_penalty=1).loss) is float
+    assert type(check([1.0], [], skip_penalty=1).loss) is int
+    assert type(check([1, 2, 3], [1, 2, 3]).loss) is int
+    assert math.isinf(check([1, 2, 3], [1, 2]).loss)